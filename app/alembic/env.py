@@ -13,7 +13,9 @@ config = context.config
 
 # Interpret the config file for Python logging.
 # This line sets up loggers basically.
-fileConfig(config.config_file_name)
+# Tests run migrations in-process and keep their own loggers.
+if config.attributes.get("configure_logger", True):
+    fileConfig(config.config_file_name)
 config.set_main_option("sqlalchemy.url", os.getenv("DATABASE_URL"))
 
 from app.dbmodels import * # do not remove
@@ -66,9 +68,16 @@ def run_migrations_online():
         poolclass=pool.NullPool,
     )
     
+    # tests migrate their own schema, see tests/unittests/conftest.py
+    schema = config.attributes.get("schema")
     with connectable.connect() as connection:
+        if schema:
+            connection.execute(f"CREATE SCHEMA IF NOT EXISTS {schema};")
+            connection.execute(f"SET search_path TO {schema};")
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection,
+            target_metadata=target_metadata,
+            version_table_schema=schema,
         )
         
         with context.begin_transaction():
@@ -0,0 +1,57 @@
+"""store amounts in minor units
+
+Revision ID: b0fcac3c080b
+Revises: f9ad85f53500
+Create Date: 2026-10-15 12:00:00.000000
+
+"""
+import decimal
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b0fcac3c080b'
+down_revision = 'f9ad85f53500'
+branch_labels = None
+depends_on = None
+
+# max amount for precision 18, scale 2; in cents it fits into BIGINT
+MAX_AMOUNT = decimal.Decimal('9999999999999999.99')
+
+
+def upgrade():
+    # amounts above new max can't be stored or pass api validation,
+    # so refuse to migrate instead of converting them
+    connection = op.get_bind()
+    for table in ('wallet', 'posting'):
+        max_amount = connection.execute(
+            sa.text(f'SELECT max(abs(amount)) FROM {table};')
+        ).scalar()
+        if max_amount is not None and max_amount > MAX_AMOUNT:
+            raise RuntimeError(
+                f"{table} has amount {max_amount} greater than max amount "
+                f"{MAX_AMOUNT}; fix these rows before running this migration"
+            )
+    for table in ('wallet', 'posting'):
+        op.alter_column(
+            table,
+            'amount',
+            type_=sa.BigInteger(),
+            existing_type=sa.Numeric(19, 2),
+            existing_nullable=False,
+            postgresql_using='(amount * 100)::bigint',
+        )
+
+
+def downgrade():
+    for table in ('wallet', 'posting'):
+        op.alter_column(
+            table,
+            'amount',
+            type_=sa.Numeric(19, 2),
+            existing_type=sa.BigInteger(),
+            existing_nullable=False,
+            postgresql_using='(amount / 100.0)::numeric(19, 2)',
+        )
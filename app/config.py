@@ -13,7 +13,8 @@ def get_max_decimal(precision, scale):
 class Settings(BaseSettings):
     db_url: str = Field(..., env="DATABASE_URL")
     is_testing: bool = Field(False, env="TESTING")
-    decimal_precision: int = 19
+    # amounts are stored as BIGINT minor units, 18 digits fit into BIGINT
+    decimal_precision: int = 18
     decimal_scale: int = 2
     max_amount: decimal.Decimal = get_max_decimal(decimal_precision, decimal_scale)
     min_amount: decimal.Decimal = decimal.Decimal(0)
@@ -1,3 +1,4 @@
+import decimal
 import uuid
 
 from app import config
@@ -21,6 +22,19 @@ class NotFound(CRUDException):
         super().__init__(self.message)
 
 
+MINOR_UNITS = 10 ** settings.decimal_scale
+
+
+def to_minor_units(amount: decimal.Decimal) -> int:
+    """Convert amount to integer minor units it is stored in"""
+    return int(amount * MINOR_UNITS)
+
+
+def from_minor_units(units: int) -> decimal.Decimal:
+    """Convert stored integer minor units back to amount"""
+    return decimal.Decimal(units).scaleb(-settings.decimal_scale)
+
+
 async def create_account_with_wallet(account: AccountCreateIn) -> AccountCreateOut:
     wallet_id = uuid.uuid4()
     account_id = uuid.uuid4()
@@ -67,7 +81,7 @@ async def get_account_with_wallet(
         name=row["name"],
         wallet_id=row["wallet_id"],
         currency=row["currency"],
-        amount=row["amount"],
+        amount=from_minor_units(row["amount"]),
         created_at=row["created_at"],
     )
 
@@ -105,14 +119,14 @@ async def _log_transfer_transaction(data):
     values = {
         "transaction_id": transaction_id,
         "wallet_id": data.from_wallet_id,
-        "amount": -data.amount,
+        "amount": -to_minor_units(data.amount),
         "currency": data.from_currency.value,
     }
     await db.execute(add_posting, values=values)
     values = {
         "transaction_id": transaction_id,
         "wallet_id": data.to_wallet_id,
-        "amount": data.amount,
+        "amount": to_minor_units(data.amount),
         "currency": data.to_currency.value,
     }
     await db.execute(add_posting, values=values)
@@ -138,17 +152,18 @@ async def _log_replenish_transaction(data):
     values = {
         "transaction_id": transaction_id,
         "wallet_id": data.wallet_id,
-        "amount": data.amount,
+        "amount": to_minor_units(data.amount),
         "currency": data.currency.value,
     }
     await db.execute(add_posting, values=values)
 
 
 async def transfer(data: TransferMoneyIn) -> TransferMoneyOut:
+    amount = to_minor_units(data.amount)
     async with db.transaction():
         # getting from wallet and check constraints
         from_wallet = await get_wallet(data.from_wallet_id, data.from_currency)
-        from_wallet_amount = from_wallet["amount"] - data.amount
+        from_wallet_amount = from_wallet["amount"] - amount
         if from_wallet_amount < 0:
             raise CRUDException(
                 f"can't transfer {data.amount} {data.from_currency.value} "
@@ -158,61 +173,71 @@ async def transfer(data: TransferMoneyIn) -> TransferMoneyOut:
 
         # getting to wallet and check constraints
         to_wallet = await get_wallet(data.to_wallet_id, data.to_currency)
-        to_wallet_amount = to_wallet["amount"] + data.amount
-        if to_wallet_amount > settings.max_amount:
+        to_wallet_amount = to_wallet["amount"] + amount
+        if to_wallet_amount > to_minor_units(settings.max_amount):
             raise CRUDException(
                 f"can't transfer to {data.to_wallet_id}; "
                 f"resulting amount is greater that max amount = {settings.max_amount}; "
-                f"current amount = {to_wallet['amount']}"
+                f"current amount = {from_minor_units(to_wallet['amount'])}"
             )
 
         # performing transfer transaction
-        update_wallet = "UPDATE wallet SET amount = :amount WHERE id = :wallet_id;"
+        update_wallet = (
+            "UPDATE wallet SET amount = :amount WHERE id = :wallet_id "
+            "RETURNING amount, currency;"
+        )
         from_wallet_values = {
             "wallet_id": data.from_wallet_id,
             "amount": from_wallet_amount,
         }
-        await db.execute(query=update_wallet, values=from_wallet_values)
+        from_wallet = await db.fetch_one(
+            query=update_wallet, values=from_wallet_values
+        )
         to_wallet_values = {"wallet_id": data.to_wallet_id, "amount": to_wallet_amount}
-        await db.execute(query=update_wallet, values=to_wallet_values)
+        to_wallet = await db.fetch_one(query=update_wallet, values=to_wallet_values)
 
         # logging transaction
         await _log_transfer_transaction(data)
 
         return TransferMoneyOut(
             from_wallet_id=data.from_wallet_id,
-            from_amount=from_wallet_amount,
-            from_currency=data.from_currency,
+            from_amount=from_minor_units(from_wallet["amount"]),
+            from_currency=from_wallet["currency"],
             to_wallet_id=data.to_wallet_id,
-            to_amount=to_wallet_amount,
-            to_currency=data.to_currency,
+            to_amount=from_minor_units(to_wallet["amount"]),
+            to_currency=to_wallet["currency"],
         )
 
 
 async def replenish(data: ReplenishWalletInfo):
     async with db.transaction():
-        query = (
-            "SELECT * FROM wallet WHERE id = :wallet_id "
-            "AND currency = :currency FOR UPDATE;"
+        # max amount check is a part of update, so successful replenish
+        # doesn't need separate select of the wallet
+        update = (
+            "UPDATE wallet SET amount = amount + :amount "
+            "WHERE id = :wallet_id AND currency = :currency "
+            "AND amount + :amount <= :max_amount "
+            "RETURNING amount, currency;"
         )
-
-        values = {"wallet_id": data.wallet_id, "currency": data.currency.value}
-        wallet = await db.fetch_one(query=query, values=values)
+        values = {
+            "amount": to_minor_units(data.amount),
+            "wallet_id": data.wallet_id,
+            "currency": data.currency.value,
+            "max_amount": to_minor_units(settings.max_amount),
+        }
+        wallet = await db.fetch_one(update, values=values)
         if wallet is None:
-            raise NotFound("wallet", values)
-
-        amount = wallet["amount"] + data.amount
-        if amount > settings.max_amount:
+            # wallet is not found (raises NotFound) or max amount is exceeded
+            wallet = await get_wallet(data.wallet_id, data.currency)
             raise CRUDException(
                 f"can't replenish to {data.wallet_id}; "
                 f"resulting amount is greater that max amount = {settings.max_amount}; "
-                f"current amount = {wallet['amount']}"
+                f"current amount = {from_minor_units(wallet['amount'])}"
             )
 
-        update = "UPDATE wallet SET amount = :amount WHERE id = :wallet_id;"
-        values = {"amount": amount, "wallet_id": data.wallet_id}
-        await db.execute(update, values=values)
         await _log_replenish_transaction(data)
         return ReplenishWalletInfo(
-            wallet_id=data.wallet_id, amount=amount, currency=data.currency
+            wallet_id=data.wallet_id,
+            amount=from_minor_units(wallet["amount"]),
+            currency=wallet["currency"],
         )
@@ -1,8 +1,7 @@
-from sqlalchemy import (Column, DateTime, ForeignKey, Integer, Numeric, String,
+from sqlalchemy import (BigInteger, Column, DateTime, ForeignKey, Integer, String,
                         Table, func)
 from sqlalchemy.dialects.postgresql import UUID
 
-from app.config import settings
 from app.database import metadata
 
 # table to store account profile
@@ -20,17 +19,14 @@ accounts = Table(
 )
 
 # table to store account's wallet
+# amount is stored in minor units (cents for USD), see crud.to_minor_units
 wallets = Table(
     "wallet",
     metadata,
     Column("id", UUID(as_uuid=True), primary_key=True),
     Column("account_id", ForeignKey("account.id"), nullable=False),
     Column("currency", ForeignKey("currency.code"), nullable=False),
-    Column(
-        "amount",
-        Numeric(precision=settings.decimal_precision, scale=settings.decimal_scale),
-        nullable=False,
-    ),
+    Column("amount", BigInteger, nullable=False),
     Column(
         "created_at", DateTime(timezone=True), server_default=func.now(), nullable=False
     ),
@@ -55,10 +51,6 @@ posting = Table(
     Column("id", Integer, primary_key=True),
     Column("transaction_id", ForeignKey("transaction.id"), nullable=False),
     Column("wallet_id", ForeignKey("wallet.id"), nullable=False),
-    Column(
-        "amount",
-        Numeric(precision=settings.decimal_precision, scale=settings.decimal_scale),
-        nullable=False,
-    ),
+    Column("amount", BigInteger, nullable=False),
     Column("currency", ForeignKey("currency.code"), nullable=False),
 )
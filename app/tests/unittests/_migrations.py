@@ -0,0 +1,33 @@
+import pathlib
+
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, pool, text
+
+from app.config import settings
+
+ALEMBIC_INI = pathlib.Path(__file__).parents[2] / "alembic.ini"
+
+
+def execute(sql, **values):
+    """
+    Execute sql outside of the force_rollback connection, so it is committed
+    Returns fetched rows if there are any
+    """
+    engine = create_engine(settings.db_url, poolclass=pool.NullPool)
+    with engine.connect() as connection:
+        result = connection.execute(text(sql), **values)
+        return result.fetchall() if result.returns_rows else None
+
+
+def drop_schema(schema):
+    execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE;")
+
+
+def migrate(schema, revision="head"):
+    """Create schema with tables by applying alembic migrations, as prestart.sh does"""
+    config = Config(str(ALEMBIC_INI))
+    config.set_main_option("script_location", str(ALEMBIC_INI.parent / "alembic"))
+    config.attributes["schema"] = schema
+    config.attributes["configure_logger"] = False
+    command.upgrade(config, revision)
@@ -0,0 +1,61 @@
+import functools
+
+from app.schemas import Currency
+
+ACCOUNT_COLUMNS = ["id", "name", "created_at"]
+WALLET_COLUMNS = ["id", "account_id", "amount", "currency"]
+
+
+@functools.lru_cache(maxsize=None)
+def insert_query(table, columns, rows_count):
+    """Multi-row INSERT with positional params numbered row by row"""
+    width = len(columns)
+    groups = (
+        "(" + ", ".join(f"${i * width + j}" for j in range(1, width + 1)) + ")"
+        for i in range(rows_count)
+    )
+    return f"INSERT INTO {table}({', '.join(columns)}) VALUES {', '.join(groups)};"
+
+
+async def insert_rows(connection, table, rows):
+    """Insert rows (dicts keyed by column name) with one INSERT statement"""
+    columns = tuple(rows[0])
+    args = [row[column] for row in rows for column in columns]
+    await connection.execute(insert_query(table, columns, len(rows)), *args)
+
+
+async def seed_pair(connection, uuids, now, from_amount, to_amount):
+    """Insert from and to accounts with USD wallets holding given minor units"""
+    async with connection.transaction():
+        await insert_rows(connection, "account", [
+            {"id": uuids.to_account, "name": "testname2", "created_at": now},
+            {"id": uuids.from_account, "name": "testname1", "created_at": now},
+        ])
+        await insert_rows(connection, "wallet", [
+            {
+                "id": uuids.from_wallet,
+                "account_id": uuids.from_account,
+                "amount": from_amount,
+                "currency": Currency.USD.value
+            },
+            {
+                "id": uuids.to_wallet,
+                "account_id": uuids.to_account,
+                "amount": to_amount,
+                "currency": Currency.USD.value
+            },
+        ])
+
+
+async def bulk_seed_accounts(connection, rows):
+    """COPY rows (tuples in ACCOUNT_COLUMNS order) into account"""
+    await connection.copy_records_to_table(
+        "account", records=rows, columns=ACCOUNT_COLUMNS
+    )
+
+
+async def bulk_seed_wallets(connection, rows):
+    """COPY rows (tuples in WALLET_COLUMNS order) into wallet"""
+    await connection.copy_records_to_table(
+        "wallet", records=rows, columns=WALLET_COLUMNS
+    )
@@ -1,10 +1,92 @@
+import asyncio
+import collections
+import datetime
+import uuid
+
 import pytest
 from starlette.testclient import TestClient
 
+from app.config import settings
+from app.database import db
 from app.main import app
+from app.tests.unittests._migrations import drop_schema, migrate
+
+Ids = collections.namedtuple("Ids", "from_account from_wallet to_account to_wallet")
 
 
 @pytest.fixture(scope="module")
 def test_app():
-    with TestClient(app) as client:
-        yield client
+    # crud is mocked in api tests, so startup/shutdown events are not run:
+    # shutdown would disconnect the session database from another loop
+    yield TestClient(app)
+
+
+@pytest.fixture(scope="session")
+def event_loop():
+    # asyncpg connections are bound to the loop they were created in,
+    # so the loop has to live as long as the session-scoped database
+    loop = asyncio.new_event_loop()
+    yield loop
+    loop.close()
+
+
+@pytest.fixture(scope="session")
+def schema(request):
+    """Schema name unique per pytest-xdist worker"""
+    worker_id = getattr(request.config, "workerinput", {}).get("workerid", "master")
+    return f"test_{worker_id}"
+
+
+@pytest.fixture(scope="session")
+async def database(schema):
+    """
+    Connect once for the whole test session
+    Tables are created by migrations in the worker's own schema, so workers
+    don't share rows or lock each other on TRUNCATE
+    Migrations are committed, so they run before connecting; search_path is set
+    on the single force_rollback connection, so tests need TESTING=1
+    """
+    if not settings.is_testing:
+        # without force_rollback TRUNCATE in clean_tables would delete real rows
+        pytest.exit("set TESTING=1 in .env to run database tests")
+    drop_schema(schema)
+    migrate(schema)
+    await db.connect()
+    # only sticks because every query runs on the force_rollback connection
+    await db.execute(f"SET search_path TO {schema};")
+    yield db
+    await db.disconnect()
+    drop_schema(schema)
+
+
+@pytest.fixture(scope="session")
+async def connection(database):
+    """
+    Raw asyncpg connection behind the database
+    With TESTING=1 it is the force_rollback connection crud queries run on,
+    so rows written through it are visible to crud and rolled back with it
+    Acquired once per session, tests don't pay an async setup/teardown for it
+    """
+    async with database.connection() as db_connection:
+        yield db_connection.raw_connection
+
+
+@pytest.fixture
+async def clean_tables(database):
+    """Remove rows created by the test"""
+    yield
+    await database.execute(
+        "TRUNCATE account, wallet, transaction, posting RESTART IDENTITY CASCADE;"
+    )
+
+
+@pytest.fixture
+def uuids():
+    """Fresh account and wallet ids for a test"""
+    return Ids(*(uuid.uuid4() for _ in Ids._fields))
+
+
+@pytest.fixture
+def now():
+    """Single timestamp for all rows seeded by a test"""
+    return datetime.datetime.now(tz=datetime.timezone.utc)
@@ -238,6 +238,20 @@ def test_replenish_wallet_limit_exception(test_app, monkeypatch):
     assert response.json() == test_response_payload
 
 
+def test_replenish_wallet_above_max_amount(test_app):
+    test_request_payload = {
+        "wallet_id": str(uuid.uuid4()),
+        "amount": "99999999999999999.99",
+        "currency": Currency.USD.value,
+    }
+    
+    response = test_app.post(f"/replenish", json=test_request_payload)
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert response.json()["detail"][0]["msg"] == (
+        "amount in range [0, 9999999999999999.99] allowed"
+    )
+
+
 def test_transfer_ok(test_app, monkeypatch):
     from_wallet_id = uuid.uuid4()
     to_wallet_id = uuid.uuid4()
@@ -337,6 +351,22 @@ def test_transfer_limit_exception(test_app, monkeypatch):
     assert response.json() == test_response_payload
 
 
+def test_transfer_above_max_amount(test_app):
+    test_request_payload = {
+        "from_wallet_id": str(uuid.uuid4()),
+        "to_wallet_id": str(uuid.uuid4()),
+        "from_currency": Currency.USD.value,
+        "to_currency": Currency.USD.value,
+        "amount": "99999999999999999.99",
+    }
+    
+    response = test_app.post(f"/transfer", json=test_request_payload)
+    assert response.status_code == status.HTTP_422_UNPROCESSABLE_ENTITY
+    assert response.json()["detail"][0]["msg"] == (
+        "amount in range [0, 9999999999999999.99] allowed"
+    )
+
+
 def test_super_hard_test():
     # number of tests must be 20
     assert True
@@ -1,377 +1,421 @@
-import datetime
 import decimal
 
-from app.database import db
 from app.schemas import AccountCreateIn, Currency, ExtendedAccountOut, ReplenishWalletInfo, TransactionType, \
     TransferMoneyOut, TransferMoneyIn
 from app.crud import uuid
 from app import crud
 from app.config import settings
+from app.tests.unittests._seed import bulk_seed_accounts, bulk_seed_wallets, insert_rows, seed_pair
 import pytest
 
+pytestmark = [pytest.mark.asyncio, pytest.mark.usefixtures("clean_tables")]
 
-@pytest.mark.asyncio
-async def test_create_account_with_wallet(monkeypatch):
-    await db.connect()
-    try:
-        test_uuid = uuid.uuid4()
-        test_name = "testname"
-        account = AccountCreateIn(name=test_name)
-        
-        def mock_uuid4():
-            return test_uuid
-        
-        monkeypatch.setattr(uuid, "uuid4", mock_uuid4)
-        await crud.create_account_with_wallet(account)
-        
-        # check account in database
-        select_account_with_wallet = (
-            "SELECT "
-            "account.id as account_id, account.name, "
-            "account.created_at, wallet.id as wallet_id, "
-            "wallet.currency, wallet.amount "
-            "FROM account JOIN wallet "
-            "ON wallet.account_id = account.id  "
-            "WHERE  account.id = :account_id;"
-        )
-        values = {"account_id": test_uuid}
-        row = await db.fetch_one(query=select_account_with_wallet, values=values)
-        assert row is not None
-        assert row["wallet_id"] == test_uuid
-        assert row["name"] == test_name
-        assert row["currency"] == Currency.USD.value
-        assert row["amount"] == 0
-    finally:
-        await db.disconnect()
 
+# amounts in minor units (cents) as they are stored in database
+FROM_AMOUNT = 9_999_999_12
+TO_AMOUNT = 12_12
+TRANSFER_AMOUNT = 789_98
+MAX_AMOUNT = 999_999_999_999_999_999
 
-@pytest.mark.asyncio
-async def test_get_account_with_wallet():
-    await db.connect()
-    try:
-        account_uuid = uuid.uuid4()
-        wallet_uuid = uuid.uuid4()
-        name = "testname"
-        amount = decimal.Decimal("9999999.12")
-        currency = Currency.USD
-        created_at = datetime.datetime.now(tz=datetime.timezone.utc)
-        
-        expected = ExtendedAccountOut(
-            account_id=account_uuid,
-            name=name,
-            wallet_id=wallet_uuid,
-            currency=currency,
-            amount=amount,
-            created_at=created_at,
-        )
-        insert_account = "INSERT INTO account(id, name, created_at) " \
-                         "VALUES (:account_id, :name, :created_at);"
-        insert_wallet = "INSERT INTO wallet(id, account_id, amount, currency) " \
-                        "VALUES (:wallet_id, :account_id, :amount, :currency);"
-        values = {"account_id": account_uuid, "name": name, "created_at": created_at}
-        await db.execute(insert_account, values)
-        values = {
+SELECT_ACCOUNT_WITH_WALLET_SQL = (
+    "SELECT "
+    "account.id as account_id, account.name, "
+    "account.created_at, wallet.id as wallet_id, "
+    "wallet.currency, wallet.amount "
+    "FROM account JOIN wallet "
+    "ON wallet.account_id = account.id  "
+    "WHERE  account.id = $1;"
+)
+SELECT_WALLET_SQL = "SELECT amount, currency FROM wallet WHERE id = $1;"
+SELECT_WALLETS_SQL = "SELECT id, amount FROM wallet WHERE id IN ($1, $2);"
+SELECT_LAST_POSTINGS_SQL = (
+    "SELECT t.id AS tid, t.type, p.amount, p.wallet_id, p.currency "
+    "FROM posting p JOIN transaction t ON p.transaction_id = t.id "
+    "WHERE t.id = (SELECT max(id) FROM transaction) "
+    "ORDER BY p.amount;"
+)
+
+
+@pytest.mark.parametrize("amount, units", [
+    (decimal.Decimal("0.00"), 0),
+    (decimal.Decimal("0.01"), 1),
+    (decimal.Decimal("12.12"), 12_12),
+    (decimal.Decimal("9999999.12"), 9_999_999_12),
+    (settings.max_amount, 999_999_999_999_999_999),
+])
+async def test_minor_units(amount, units):
+    assert crud.to_minor_units(amount) == units
+    assert str(crud.from_minor_units(units)) == str(amount)
+
+
+async def test_create_account_with_wallet(connection, uuids, monkeypatch):
+    test_uuid = uuids.from_account
+    test_name = "testname"
+    account = AccountCreateIn(name=test_name)
+    
+    def mock_uuid4():
+        return test_uuid
+    
+    monkeypatch.setattr(uuid, "uuid4", mock_uuid4)
+    await crud.create_account_with_wallet(account)
+    
+    # check account in database
+    row = await connection.fetchrow(SELECT_ACCOUNT_WITH_WALLET_SQL, test_uuid)
+    assert row is not None
+    _, name, _, wallet_id, currency, amount = row
+    assert wallet_id == test_uuid
+    assert name == test_name
+    assert currency == Currency.USD.value
+    assert amount == 0
+
+
+async def test_get_account_with_wallet(connection, uuids, now):
+    account_uuid = uuids.from_account
+    wallet_uuid = uuids.from_wallet
+    name = "testname"
+    amount = FROM_AMOUNT
+    currency = Currency.USD
+    
+    expected = ExtendedAccountOut(
+        account_id=account_uuid,
+        name=name,
+        wallet_id=wallet_uuid,
+        currency=currency,
+        amount=decimal.Decimal("9999999.12"),
+        created_at=now,
+    )
+    async with connection.transaction():
+        await insert_rows(connection, "account", [
+            {"id": account_uuid, "name": name, "created_at": now},
+        ])
+        await insert_rows(connection, "wallet", [{
+            "id": wallet_uuid,
             "account_id": account_uuid,
-            "wallet_id": wallet_uuid,
             "amount": amount,
             "currency": currency.value
-        }
-        await db.execute(insert_wallet, values)
-        
-        account = await crud.get_account_with_wallet(account_uuid)
-        
-        # check account in database
-        
-        assert account == expected
-    finally:
-        await db.disconnect()
+        }])
+    
+    account = await crud.get_account_with_wallet(account_uuid)
+    
+    # check account in database
+    
+    assert account == expected
 
 
-@pytest.mark.asyncio
-async def test_transfer():
-    await db.connect()
-    try:
-        from_account_id = uuid.uuid4()
-        from_name = "testname1"
-        from_amount = decimal.Decimal("9999999.12")
-        from_wallet_id = uuid.uuid4()
-        from_created_at = datetime.datetime.now(tz=datetime.timezone.utc)
-        
-        to_account_id = uuid.uuid4()
-        to_name = "testname2"
-        to_amount = decimal.Decimal("12.12")
-        to_wallet_id = uuid.uuid4()
-        to_created_at = datetime.datetime.now(tz=datetime.timezone.utc)
-        
-        transfer_amount = decimal.Decimal("789.98")
-        currency = Currency.USD
-        input = TransferMoneyIn(
-            from_wallet_id=from_wallet_id,
-            from_currency=currency,
-            to_wallet_id=to_wallet_id,
-            to_currency=currency,
-            amount=transfer_amount
-        )
-        expected = TransferMoneyOut(
-            from_wallet_id=from_wallet_id,
-            from_amount=from_amount - transfer_amount,
-            from_currency=currency,
-            to_wallet_id=to_wallet_id,
-            to_amount=to_amount + transfer_amount,
-            to_currency=currency,
-        )
-        # add 2 accounts
-        insert_account = "INSERT INTO account(id, name, created_at) " \
-                         "VALUES (:account_id, :name, :created_at);"
-        insert_wallet = "INSERT INTO wallet(id, account_id, amount, currency) " \
-                        "VALUES (:wallet_id, :account_id, :amount, :currency);"
-        values = {"account_id": to_account_id, "name": to_name, "created_at": to_created_at}
-        await db.execute(insert_account, values)
-        values = {"account_id": from_account_id, "name": from_name, "created_at": from_created_at}
-        await db.execute(insert_account, values)
-        values = {
-            "account_id": from_account_id,
-            "wallet_id": from_wallet_id,
-            "amount": from_amount,
-            "currency": currency.value
-        }
-        await db.execute(insert_wallet, values)
-        values = {
-            "account_id": to_account_id,
-            "wallet_id": to_wallet_id,
-            "amount": to_amount,
-            "currency": currency.value
-        }
-        await db.execute(insert_wallet, values)
-        
-        # perform transfer
-        actual = await crud.transfer(input)
-        
-        # get money in wallets
-        select_wallet = "SELECT amount FROM wallet WHERE id = :wallet_id"
-        from_wallet = await db.fetch_one(select_wallet, {"wallet_id": from_wallet_id})
-        to_wallet = await db.fetch_one(select_wallet, {"wallet_id": to_wallet_id})
-        # get transactions
-        select_transaction = "SELECT id, type FROM transaction ORDER BY id DESC LIMIT 1;"
-        transaction = await db.fetch_one(select_transaction)
-        select_posting = "SELECT amount, wallet_id, currency FROM posting WHERE transaction_id = :tid;"
-        posting = await db.fetch_all(select_posting, {"tid": transaction["id"]})
-        
-        # check return value
-        assert actual == expected
-        # check money in wallets
-        assert from_wallet["amount"] == from_amount - transfer_amount
-        assert to_wallet["amount"] == to_amount + transfer_amount
-        # check transaction added
-        assert transaction["type"] == TransactionType.transfer.value
-        assert posting[0]["amount"] == -transfer_amount
-        assert posting[0]["wallet_id"] == from_wallet_id
-        assert posting[1]["amount"] == transfer_amount
-        assert posting[1]["wallet_id"] == to_wallet_id
-    finally:
-        await db.disconnect()
+async def test_transfer(connection, uuids, now):
+    from_wallet_id = uuids.from_wallet
+    to_wallet_id = uuids.to_wallet
+    from_amount = FROM_AMOUNT
+    
+    to_amount = TO_AMOUNT
+    
+    transfer_amount = TRANSFER_AMOUNT
+    currency = Currency.USD
+    input = TransferMoneyIn(
+        from_wallet_id=from_wallet_id,
+        from_currency=currency,
+        to_wallet_id=to_wallet_id,
+        to_currency=currency,
+        amount=decimal.Decimal("789.98")
+    )
+    expected = TransferMoneyOut(
+        from_wallet_id=from_wallet_id,
+        from_amount=decimal.Decimal("9999209.14"),
+        from_currency=currency,
+        to_wallet_id=to_wallet_id,
+        to_amount=decimal.Decimal("802.10"),
+        to_currency=currency,
+    )
+    # add 2 accounts
+    # inserts are not overlapped: wallet rows reference account rows and
+    # all queries are serialised on the single force_rollback connection
+    await seed_pair(connection, uuids, now, from_amount, to_amount)
+    
+    # perform transfer
+    actual = await crud.transfer(input)
+    
+    # get postings of the last transaction
+    debit, credit = await connection.fetch(SELECT_LAST_POSTINGS_SQL)
+    _, transaction_type, debit_amount, debit_wallet_id, _ = debit
+    _, _, credit_amount, credit_wallet_id, _ = credit
+    
+    # check return value
+    assert actual == expected
+    # check transaction added
+    assert transaction_type == TransactionType.transfer.value
+    assert debit_amount == -transfer_amount
+    assert debit_wallet_id == from_wallet_id
+    assert credit_amount == transfer_amount
+    assert credit_wallet_id == to_wallet_id
 
 
-@pytest.mark.asyncio
-async def test_transfer_exceptions():
-    await db.connect()
-    try:
-        from_account_id = uuid.uuid4()
-        from_name = "testname1"
-        from_amount = decimal.Decimal("9999999.12")
-        from_wallet_id = uuid.uuid4()
-        from_created_at = datetime.datetime.now(tz=datetime.timezone.utc)
-        
-        to_account_id = uuid.uuid4()
-        to_name = "testname2"
-        to_amount = settings.max_amount
-        to_wallet_id = uuid.uuid4()
-        to_created_at = datetime.datetime.now(tz=datetime.timezone.utc)
-        
-        transfer_amount = decimal.Decimal(1)
-        currency = Currency.USD
-        
-        input_1 = TransferMoneyIn(
-            from_wallet_id=from_wallet_id,
-            from_currency=Currency.USD,
-            to_wallet_id=to_wallet_id,
-            to_currency=Currency.USD,
-            amount=transfer_amount
-        )
-        # check first wallet
-        with pytest.raises(crud.CRUDException) as not_found_error_info:
-            await crud.transfer(input_1)
-        values = dict(wallet_id=from_wallet_id, currency=currency.value)
-        etext = f"wallet with {values} not found"
-        assert not_found_error_info.value.message == etext
-        
-        insert_account = "INSERT INTO account(id, name, created_at) " \
-                         "VALUES (:account_id, :name, :created_at);"
-        insert_wallet = "INSERT INTO wallet(id, account_id, amount, currency) " \
-                        "VALUES (:wallet_id, :account_id, :amount, :currency);"
-        values = {"account_id": to_account_id, "name": to_name, "created_at": to_created_at}
-        await db.execute(insert_account, values)
-        values = {"account_id": from_account_id, "name": from_name, "created_at": from_created_at}
-        await db.execute(insert_account, values)
-        values = {
+@pytest.mark.slow
+async def test_transfer_persists_amounts(connection, uuids, now):
+    from_wallet_id = uuids.from_wallet
+    to_wallet_id = uuids.to_wallet
+    currency = Currency.USD
+    await seed_pair(connection, uuids, now, FROM_AMOUNT, TO_AMOUNT)
+    
+    await crud.transfer(TransferMoneyIn(
+        from_wallet_id=from_wallet_id,
+        from_currency=currency,
+        to_wallet_id=to_wallet_id,
+        to_currency=currency,
+        amount=decimal.Decimal("789.98")
+    ))
+    
+    # money in wallets matches what transfer returned
+    wallets = dict(await connection.fetch(SELECT_WALLETS_SQL, from_wallet_id, to_wallet_id))
+    assert wallets[from_wallet_id] == FROM_AMOUNT - TRANSFER_AMOUNT
+    assert wallets[to_wallet_id] == TO_AMOUNT + TRANSFER_AMOUNT
+
+
+async def test_transfer_missing_from_wallet(uuids):
+    from_wallet_id = uuids.from_wallet
+    to_wallet_id = uuids.to_wallet
+    currency = Currency.USD
+    input_1 = TransferMoneyIn(
+        from_wallet_id=from_wallet_id,
+        from_currency=currency,
+        to_wallet_id=to_wallet_id,
+        to_currency=currency,
+        amount=decimal.Decimal(1)
+    )
+    
+    with pytest.raises(crud.CRUDException) as not_found_error_info:
+        await crud.transfer(input_1)
+    values = dict(wallet_id=from_wallet_id, currency=currency.value)
+    etext = f"wallet with {values} not found"
+    assert not_found_error_info.value.message == etext
+
+
+async def test_transfer_missing_to_wallet(connection, uuids, now):
+    from_account_id = uuids.from_account
+    from_wallet_id = uuids.from_wallet
+    to_wallet_id = uuids.to_wallet
+    from_name = "testname1"
+    from_amount = FROM_AMOUNT
+    
+    currency = Currency.USD
+    input_1 = TransferMoneyIn(
+        from_wallet_id=from_wallet_id,
+        from_currency=currency,
+        to_wallet_id=to_wallet_id,
+        to_currency=currency,
+        amount=decimal.Decimal(1)
+    )
+    # only the from wallet has to exist to reach the to wallet lookup
+    async with connection.transaction():
+        await insert_rows(connection, "account", [
+            {"id": from_account_id, "name": from_name, "created_at": now},
+        ])
+        await insert_rows(connection, "wallet", [{
+            "id": from_wallet_id,
             "account_id": from_account_id,
-            "wallet_id": from_wallet_id,
             "amount": from_amount,
             "currency": currency.value
-        }
-        await db.execute(insert_wallet, values)
-        
-        # check second wallet
-        with pytest.raises(crud.CRUDException) as not_found_error_info:
-            await crud.transfer(input_1)
-        values = dict(wallet_id=to_wallet_id, currency=currency.value)
-        etext = f"wallet with {values} not found"
-        assert not_found_error_info.value.message == etext
-        
-        values = {
-            "account_id": to_account_id,
-            "wallet_id": to_wallet_id,
-            "amount": to_amount,
-            "currency": currency.value
-        }
-        await db.execute(insert_wallet, values)
-        # check max amount exception
-        with pytest.raises(crud.CRUDException) as max_amount_error:
-            await crud.transfer(input_1)
-        
-        select_wallet = "SELECT amount FROM wallet WHERE id = :wallet_id"
-        from_wallet = await db.fetch_one(select_wallet, {"wallet_id": from_wallet_id})
-        to_wallet = await db.fetch_one(select_wallet, {"wallet_id": to_wallet_id})
-        etext1 = (f"can't transfer to {to_wallet_id}; "
-                  f"resulting amount is greater that max amount = {settings.max_amount}; "
-                  f"current amount = {to_wallet['amount']}")
-        etext2 = (
-            f"can't transfer {transfer_amount} {currency.value} "
-            f"from wallet {from_wallet_id}: "
-            f"not enough amount"
-        )
-        # check money didn't changed
-        assert from_wallet["amount"] == from_amount
-        assert to_wallet["amount"] == to_amount
-        assert max_amount_error.value.message == etext1
-        
-        # check another exception
-        await db.execute("UPDATE wallet SET amount = 0 WHERE id = :from_wallet_id",
-                         {"from_wallet_id": from_wallet_id})
-        from_wallet = await db.fetch_one(select_wallet, {"wallet_id": from_wallet_id})
-        with pytest.raises(crud.CRUDException) as negative_amount_error:
-            await crud.transfer(input_1)
-        assert from_wallet["amount"] == 0
-        # money on second wallet didn't changed
-        assert to_wallet["amount"] == to_amount
-        assert negative_amount_error.value.message == etext2
-    finally:
-        await db.disconnect()
+        }])
+    
+    with pytest.raises(crud.CRUDException) as not_found_error_info:
+        await crud.transfer(input_1)
+    values = dict(wallet_id=to_wallet_id, currency=currency.value)
+    etext = f"wallet with {values} not found"
+    assert not_found_error_info.value.message == etext
 
 
-@pytest.mark.asyncio
-async def test_replenish():
-    await db.connect()
-    try:
-        account_id = uuid.uuid4()
-        wallet_id = uuid.uuid4()
-        name = "testname"
-        amount = decimal.Decimal("9999999.12")
-        replenish_amount = decimal.Decimal("789.98")
-        currency = Currency.USD
-        created_at = datetime.datetime.now(tz=datetime.timezone.utc)
-        wallet_info_in = ReplenishWalletInfo(
-            wallet_id=wallet_id, amount=replenish_amount, currency=currency
-        )
-        expected_wallet_info = ReplenishWalletInfo(
-            wallet_id=wallet_id, amount=replenish_amount + amount, currency=currency
+async def test_transfer_exceeds_max(connection, uuids, now):
+    from_wallet_id = uuids.from_wallet
+    to_wallet_id = uuids.to_wallet
+    from_amount = FROM_AMOUNT
+    
+    to_amount = MAX_AMOUNT
+    
+    currency = Currency.USD
+    input_1 = TransferMoneyIn(
+        from_wallet_id=from_wallet_id,
+        from_currency=currency,
+        to_wallet_id=to_wallet_id,
+        to_currency=currency,
+        amount=decimal.Decimal(1)
+    )
+    await seed_pair(connection, uuids, now, from_amount, to_amount)
+    
+    with pytest.raises(crud.CRUDException) as max_amount_error:
+        await crud.transfer(input_1)
+    
+    wallets = dict(await connection.fetch(SELECT_WALLETS_SQL, from_wallet_id, to_wallet_id))
+    etext = (f"can't transfer to {to_wallet_id}; "
+             f"resulting amount is greater that max amount = {settings.max_amount}; "
+             f"current amount = 9999999999999999.99")
+    # check money didn't changed
+    assert wallets[from_wallet_id] == from_amount
+    assert wallets[to_wallet_id] == to_amount
+    assert max_amount_error.value.message == etext
+
+
+async def test_transfer_insufficient_funds(connection, uuids, now):
+    from_wallet_id = uuids.from_wallet
+    to_wallet_id = uuids.to_wallet
+    from_amount = 0
+    
+    to_amount = TO_AMOUNT
+    
+    transfer_amount = decimal.Decimal(1)
+    currency = Currency.USD
+    
+    input_1 = TransferMoneyIn(
+        from_wallet_id=from_wallet_id,
+        from_currency=Currency.USD,
+        to_wallet_id=to_wallet_id,
+        to_currency=Currency.USD,
+        amount=transfer_amount
+    )
+    await seed_pair(connection, uuids, now, from_amount, to_amount)
+    
+    with pytest.raises(crud.CRUDException) as negative_amount_error:
+        await crud.transfer(input_1)
+    
+    wallets = dict(await connection.fetch(SELECT_WALLETS_SQL, from_wallet_id, to_wallet_id))
+    etext = (
+        f"can't transfer {transfer_amount} {currency.value} "
+        f"from wallet {from_wallet_id}: "
+        f"not enough amount"
+    )
+    # money in wallets didn't changed
+    assert wallets[from_wallet_id] == from_amount
+    assert wallets[to_wallet_id] == to_amount
+    assert negative_amount_error.value.message == etext
+
+
+@pytest.mark.parametrize("wallets_count", [2, pytest.param(1000, marks=pytest.mark.slow)])
+async def test_transfer_among_many_wallets(connection, wallets_count, now):
+    amount = 100_00
+    transfer_amount = 78_99
+    currency = Currency.USD
+    account_ids = [uuid.uuid4() for _ in range(wallets_count)]
+    wallet_ids = [uuid.uuid4() for _ in range(wallets_count)]
+    async with connection.transaction():
+        await bulk_seed_accounts(
+            connection, [(account_id, "testname", now) for account_id in account_ids]
         )
-        # add account
-        insert_account = "INSERT INTO account(id, name, created_at) " \
-                         "VALUES (:account_id, :name, :created_at);"
-        insert_wallet = "INSERT INTO wallet(id, account_id, amount, currency) " \
-                        "VALUES (:wallet_id, :account_id, :amount, :currency);"
-        values = {"account_id": account_id, "name": name, "created_at": created_at}
-        await db.execute(insert_account, values)
-        values = {
+        await bulk_seed_wallets(connection, [
+            (wallet_id, account_id, amount, currency.value)
+            for wallet_id, account_id in zip(wallet_ids, account_ids)
+        ])
+    
+    await crud.transfer(TransferMoneyIn(
+        from_wallet_id=wallet_ids[0],
+        from_currency=currency,
+        to_wallet_id=wallet_ids[-1],
+        to_currency=currency,
+        amount=decimal.Decimal("78.99")
+    ))
+    
+    total = await connection.fetchval("SELECT sum(amount) FROM wallet;")
+    changed = await connection.fetch(
+        "SELECT id, amount FROM wallet WHERE amount <> $1 ORDER BY amount;", amount
+    )
+    # money moved between two wallets only and total amount is the same
+    assert total == amount * wallets_count
+    assert len(changed) == 2
+    (debit_wallet_id, debit_amount), (credit_wallet_id, credit_amount) = changed
+    assert debit_wallet_id == wallet_ids[0]
+    assert debit_amount == amount - transfer_amount
+    assert credit_wallet_id == wallet_ids[-1]
+    assert credit_amount == amount + transfer_amount
+
+
+async def test_replenish(connection, uuids, now):
+    account_id = uuids.to_account
+    wallet_id = uuids.to_wallet
+    name = "testname"
+    amount = FROM_AMOUNT
+    replenish_amount = TRANSFER_AMOUNT
+    currency = Currency.USD
+    wallet_info_in = ReplenishWalletInfo(
+        wallet_id=wallet_id,
+        amount=decimal.Decimal("789.98"),
+        currency=currency,
+    )
+    expected_wallet_info = ReplenishWalletInfo(
+        wallet_id=wallet_id,
+        amount=decimal.Decimal("10000789.10"),
+        currency=currency,
+    )
+    # add account
+    async with connection.transaction():
+        await insert_rows(connection, "account", [
+            {"id": account_id, "name": name, "created_at": now},
+        ])
+        await insert_rows(connection, "wallet", [{
+            "id": wallet_id,
             "account_id": account_id,
-            "wallet_id": wallet_id,
             "amount": amount,
             "currency": currency.value
-        }
-        await db.execute(insert_wallet, values)
-        
-        wallet_info_out = await crud.replenish(wallet_info_in)
-        # check money in account
-        select_wallet = "SELECT amount, currency FROM wallet WHERE id = :wallet_id"
-        replenished_wallet = await db.fetch_one(select_wallet, {"wallet_id": wallet_id})
-        # check transactions
-        select_transaction = "SELECT id, type FROM transaction ORDER BY id DESC LIMIT 1;"
-        transaction = await db.fetch_one(select_transaction)
-        select_posting = "SELECT amount, wallet_id, currency FROM posting WHERE transaction_id = :tid;"
-        posting = await db.fetch_one(select_posting, {"tid": transaction["id"]})
-        
-        assert wallet_info_out == expected_wallet_info
-        assert replenished_wallet["amount"] == expected_wallet_info.amount
-        assert replenished_wallet["currency"] == expected_wallet_info.currency.value
-        assert transaction["type"] == TransactionType.replenish.value
-        assert posting["amount"] == replenish_amount
-        assert posting["wallet_id"] == wallet_id
-        assert posting["currency"] == currency.value
-    finally:
-        await db.disconnect()
+        }])
+    
+    # replenish returns amount and currency the wallet was updated to
+    wallet_info_out = await crud.replenish(wallet_info_in)
+    # check postings of the last transaction
+    posting = await connection.fetchrow(SELECT_LAST_POSTINGS_SQL)
+    _, transaction_type, posting_amount, posting_wallet_id, posting_currency = posting
+    
+    assert wallet_info_out == expected_wallet_info
+    assert transaction_type == TransactionType.replenish.value
+    assert posting_amount == replenish_amount
+    assert posting_wallet_id == wallet_id
+    assert posting_currency == currency.value
 
 
-@pytest.mark.asyncio
-async def test_replenish_exceptions():
-    await db.connect()
-    try:
-        account_id = uuid.uuid4()
-        wallet_id = uuid.uuid4()
-        name = "testname"
-        amount = settings.max_amount
-        replenish_amount = decimal.Decimal(1)
-        currency = Currency.USD
-        created_at = datetime.datetime.now(tz=datetime.timezone.utc)
-        wallet_info_in = ReplenishWalletInfo(
-            wallet_id=wallet_id, amount=replenish_amount, currency=currency
-        )
-        # wallet not found
-        with pytest.raises(crud.CRUDException) as not_found_error_info:
-            await crud.replenish(wallet_info_in)
-        values = dict(wallet_id=wallet_id, currency=currency.value)
-        etext = f"wallet with {values} not found"
-        assert not_found_error_info.value.message == etext
-        
-        # add account
-        insert_account = "INSERT INTO account(id, name, created_at) " \
-                         "VALUES (:account_id, :name, :created_at);"
-        insert_wallet = "INSERT INTO wallet(id, account_id, amount, currency) " \
-                        "VALUES (:wallet_id, :account_id, :amount, :currency);"
-        values = {"account_id": account_id, "name": name, "created_at": created_at}
-        await db.execute(insert_account, values)
-        values = {
+async def test_replenish_missing_wallet(uuids):
+    wallet_id = uuids.to_wallet
+    currency = Currency.USD
+    wallet_info_in = ReplenishWalletInfo(
+        wallet_id=wallet_id, amount=decimal.Decimal(1), currency=currency
+    )
+    
+    with pytest.raises(crud.CRUDException) as not_found_error_info:
+        await crud.replenish(wallet_info_in)
+    values = dict(wallet_id=wallet_id, currency=currency.value)
+    etext = f"wallet with {values} not found"
+    assert not_found_error_info.value.message == etext
+
+
+async def test_replenish_exceeds_max(connection, uuids, now):
+    account_id = uuids.to_account
+    wallet_id = uuids.to_wallet
+    name = "testname"
+    amount = MAX_AMOUNT
+    replenish_amount = decimal.Decimal(1)
+    currency = Currency.USD
+    wallet_info_in = ReplenishWalletInfo(
+        wallet_id=wallet_id,
+        amount=replenish_amount,
+        currency=currency,
+    )
+    # add account
+    async with connection.transaction():
+        await insert_rows(connection, "account", [
+            {"id": account_id, "name": name, "created_at": now},
+        ])
+        await insert_rows(connection, "wallet", [{
+            "id": wallet_id,
             "account_id": account_id,
-            "wallet_id": wallet_id,
             "amount": amount,
             "currency": currency.value
-        }
-        await db.execute(insert_wallet, values)
-        
-        # can't replenish - max amount exception
-        with pytest.raises(crud.CRUDException) as max_amount_error_info:
-            await crud.replenish(wallet_info_in)
-        etext = (
-            f"can't replenish to {wallet_id}; "
-            f"resulting amount is greater that max amount = {settings.max_amount}; "
-            f"current amount = {amount}"
-        )
-        assert max_amount_error_info.value.message == etext
-        # check money in account
-        select_wallet = "SELECT amount, currency FROM wallet WHERE id = :wallet_id"
-        replenished_wallet = await db.fetch_one(select_wallet, {"wallet_id": wallet_id})
-        
-        # money haven't changed
-        assert replenished_wallet["amount"] == amount
-    finally:
-        await db.disconnect()
+        }])
+    
+    # can't replenish - max amount exception
+    with pytest.raises(crud.CRUDException) as max_amount_error_info:
+        await crud.replenish(wallet_info_in)
+    etext = (
+        f"can't replenish to {wallet_id}; "
+        f"resulting amount is greater that max amount = {settings.max_amount}; "
+        f"current amount = 9999999999999999.99"
+    )
+    assert max_amount_error_info.value.message == etext
+    # check money in account
+    wallet_amount, _ = await connection.fetchrow(SELECT_WALLET_SQL, wallet_id)
+    
+    # money haven't changed
+    assert wallet_amount == amount
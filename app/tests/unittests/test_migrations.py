@@ -0,0 +1,66 @@
+import re
+import uuid
+
+import pytest
+
+from app.config import settings
+from app.tests.unittests._migrations import drop_schema, execute, migrate
+
+BEFORE_MINOR_UNITS = "f9ad85f53500"
+MINOR_UNITS = "b0fcac3c080b"
+
+
+@pytest.fixture
+def migrations_schema(schema):
+    """Worker's scratch schema to apply migrations step by step"""
+    if not settings.is_testing:
+        pytest.exit("set TESTING=1 in .env to run database tests")
+    name = f"{schema}_migrations"
+    drop_schema(name)
+    yield name
+    drop_schema(name)
+
+
+def seed_wallet(schema, amount):
+    """Insert account with wallet holding amount in the pre-minor-units schema"""
+    account_id = str(uuid.uuid4())
+    wallet_id = str(uuid.uuid4())
+    execute(
+        f"INSERT INTO {schema}.account(id, name) VALUES (:account_id, 'testname');",
+        account_id=account_id,
+    )
+    execute(
+        f"INSERT INTO {schema}.wallet(id, account_id, currency, amount) "
+        f"VALUES (:wallet_id, :account_id, 'USD', :amount);",
+        wallet_id=wallet_id, account_id=account_id, amount=amount,
+    )
+    return wallet_id
+
+
+def test_minor_units_migration(migrations_schema):
+    migrate(migrations_schema, BEFORE_MINOR_UNITS)
+    wallet_id = seed_wallet(migrations_schema, "9999999.12")
+    
+    migrate(migrations_schema, MINOR_UNITS)
+    
+    (amount,), = execute(
+        f"SELECT amount FROM {migrations_schema}.wallet WHERE id = :wallet_id;",
+        wallet_id=wallet_id,
+    )
+    assert amount == 9_999_999_12
+
+
+def test_minor_units_migration_above_max_amount(migrations_schema):
+    migrate(migrations_schema, BEFORE_MINOR_UNITS)
+    seed_wallet(migrations_schema, "99999999999999999.99")
+    
+    etext = (
+        "wallet has amount 99999999999999999.99 greater than max amount "
+        "9999999999999999.99; fix these rows before running this migration"
+    )
+    with pytest.raises(RuntimeError, match=re.escape(etext)):
+        migrate(migrations_schema, MINOR_UNITS)
+    
+    # amounts are left untouched
+    (amount,), = execute(f"SELECT amount FROM {migrations_schema}.wallet;")
+    assert str(amount) == "99999999999999999.99"